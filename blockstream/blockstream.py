@@ -35,15 +35,16 @@
 
 """ctypes binding for the blockstream shared library"""
 __docformat__ = 'restructuredtext'
-__all__ = ['load_blockstream', 'get_appname', 'BS3Error', 'BS3BaseHeader',
-           'BS3DataBlockHeader', 'BS3BaseBlock', 'USE_PROCESS']
+__all__ = ['load_blockstream', 'get_appname', 'get_struct', 'BS3Error',
+           'BS3BaseHeader', 'BS3DataBlockHeader', 'BS3BaseBlock',
+           'USE_PROCESS']
 
 ##---IMPORTS
 
 import os
 import platform
-from ctypes import CDLL
-from struct import pack, unpack, calcsize
+from ctypes import CDLL, POINTER, c_bool, c_char, c_char_p, c_int16, c_int64
+from struct import Struct, error as StructError
 from ConfigParser import ConfigParser
 
 ##---CONSTANTS
@@ -53,22 +54,47 @@ CONTROL_PORT = 15000
 try:
     LIBHANDLE
     USE_PROCESS
-except:
+except NameError:
     lib_name = 'libBlockStream.so'
     if platform.system() == 'Windows':
         lib_name = 'BlockStream.dll'
     cfg = ConfigParser()
     cfg.read(os.path.join(os.path.dirname(__file__), 'blockstream.ini'))
-    lib_dir = cfg.get('library', 'libdir')
+    lib_dir = os.path.abspath(cfg.get('library', 'libdir'))
     USE_PROCESS = cfg.getboolean('parallel', 'use_process')
     target = os.path.join(lib_dir, lib_name)
     print 'looking for:', target
-    os.chdir(lib_dir)
+    if platform.system() == 'Windows':
+        # let the loader find the runtime dlls next to the library without
+        # changing the working directory of the whole process
+        os.environ['PATH'] = os.pathsep.join([lib_dir,
+                                              os.environ.get('PATH', '')])
     LIBHANDLE = CDLL(target)
+    # reader prototypes, readers are identified by an int16
+    LIBHANDLE.startReader.argtypes = [c_char_p, c_char_p]
+    LIBHANDLE.startReader.restype = c_int16
+    # bool readBlock(const int16 readerID,
+    #                int64* latency
+    #                int64* blockSize,
+    #                const void** data,
+    #                int16 timeout);
+    LIBHANDLE.readBlock.argtypes = [c_int16,
+                                    POINTER(c_int64),
+                                    POINTER(c_int64),
+                                    POINTER(POINTER(c_char)),
+                                    c_int16]
+    LIBHANDLE.readBlock.restype = c_bool
+    LIBHANDLE.releaseBlock.argtypes = [c_int16]
+    LIBHANDLE.finalizeReader.argtypes = [c_int16]
+    LIBHANDLE.setReaderActive.argtypes = [c_int16, c_bool]
     LIBHANDLE.init()
     print LIBHANDLE
     del lib_name, lib_dir, cfg, target
 
+BUFFER_TYPES = (str, buffer, bytearray)
+STRUCT_CACHE_SIZE = 256
+_STRUCT_CACHE = {}
+
 ##---FUNCTIONS
 
 def load_blockstream(app_name='unknown!!'):
@@ -87,6 +113,23 @@ def get_appname():
     global APPNAME
     return APPNAME
 
+
+def get_struct(signature):
+    """returns a precompiled `struct.Struct` for signature
+
+    Use this for variable length signatures (like '<%dH' % n) and for
+    signatures shared between header classes, so the format string is only
+    parsed once per distinct signature. The cache is cleared once it holds
+    more than STRUCT_CACHE_SIZE entries.
+    """
+
+    rval = _STRUCT_CACHE.get(signature)
+    if rval is None:
+        if len(_STRUCT_CACHE) >= STRUCT_CACHE_SIZE:
+            _STRUCT_CACHE.clear()
+        rval = _STRUCT_CACHE[signature] = Struct(signature)
+    return rval
+
 ##---CLASSES
 
 class BS3Error(Exception):
@@ -98,20 +141,40 @@ class BS3BaseHeader(object):
 
     Subclasses should define the version and the binary signature as of the
     header as a class attribute. The version is an int, the signature is a str
-    as explained in the `struct` package. Subclasses must implement the
-    payload
-    and from_data method.
+    as explained in the `struct` package. _struct should hold the compiled
+    `struct.Struct` for the signature and SIZE its size in bytes. Subclasses
+    must implement the payload and from_data method.
     """
 
+    __slots__ = ()
+
+    def __getstate__(self):
+        # slotted classes need this to pickle with protocol 0 and 1
+        return dict((name, getattr(self, name))
+                    for cls in type(self).__mro__
+                    for name in getattr(cls, '__slots__', ()))
+
+    def __setstate__(self, state):
+        for name, value in state.iteritems():
+            setattr(self, name, value)
+
     version = 0
     signature = '???'
+    _struct = None
+    SIZE = 0
 
     def payload(self):
         raise NotImplementedError
 
+    def pack_into(self, buf, offset):
+        """write the binary data into the writable buffer buf at offset"""
+
+        data = self.payload()
+        buf[offset:offset + len(data)] = data
+
     @classmethod
     def __len__(cls):
-        return calcsize(cls.signature)
+        return cls.SIZE
 
     @staticmethod
     def from_data(data):
@@ -125,8 +188,13 @@ class BS3DataBlockHeader(BS3BaseHeader):
     blockstream libray internally.
     """
 
+    __slots__ = ('block_size', 'writer_id', 'block_index', 'time_stamp',
+                 'block_code')
+
     version = 3
     signature = '<BIHHQqB4sQ'
+    _struct = get_struct(signature)
+    SIZE = _struct.size
 
     type_code = 1
     header_size = 31
@@ -152,18 +220,26 @@ class BS3DataBlockHeader(BS3BaseHeader):
         self.time_stamp = int(time_stamp)
         self.block_code = str(block_code)
 
+    def _values(self):
+        return (self.version,
+                self.block_size,
+                self.header_size,
+                self.writer_id,
+                self.block_index,
+                self.time_stamp,
+                self.type_code,
+                self.block_code,
+                0)
+
     def payload(self):
         """return the binary data str"""
 
-        return pack(self.signature,
-                    self.version,
-                    self.block_size,
-                    self.header_size,
-                    self.writer_id,
-                    self.block_index,
-                    self.time_stamp,
-                    self.block_code,
-                    0)
+        return self._struct.pack(*self._values())
+
+    def pack_into(self, buf, offset):
+        """write the binary data into the writable buffer buf at offset"""
+
+        self._struct.pack_into(buf, offset, *self._values())
 
     def __str__(self):
         return 'BS3(#%s~@%s~[%s])' % (self.block_size,
@@ -174,14 +250,14 @@ class BS3DataBlockHeader(BS3BaseHeader):
     def from_data(data):
         """build from data"""
 
-        if not isinstance(data, str):
-            raise TypeError('needs a sting as input!')
-        if len(data) < BS3DataBlockHeader.__len__():
+        if not isinstance(data, BUFFER_TYPES):
+            raise TypeError('needs a str or buffer as input!')
+        try:
+            fields = BS3DataBlockHeader._struct.unpack_from(data, 0)
+        except StructError:
             raise ValueError(
-                'data must have len >= %s' % BS3DataBlockHeader.__len__())
-        ver, bsz, hsz, wid, bix, tsp, tcd, bcd, xxx = unpack(
-            BS3DataBlockHeader.signature,
-            data[:BS3DataBlockHeader.__len__()])
+                'data must have len >= %s' % BS3DataBlockHeader.SIZE)
+        ver, bsz, hsz, wid, bix, tsp, tcd, bcd, xxx = fields
         if ver != BS3DataBlockHeader.version:
             raise ValueError(
                 'invalid protocol version(%s) or blocktype(%s)!' % (ver, tcd))
@@ -201,7 +277,7 @@ class BS3BaseBlock(object):
         self.header = header
 
     def __str__(self):
-        return '%s' % self.header
+        return str(self.header)
 
 ##---MAIN
 
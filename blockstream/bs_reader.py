@@ -37,7 +37,9 @@ __all__ = ['BS3Reader', 'ProtocolHandler', 'Queue', 'Empty']
 
 ##---IMPORTS
 
-from ctypes import byref, c_int64, c_char, POINTER
+import logging
+from time import time
+from ctypes import byref, string_at, c_int64, c_char, POINTER
 from blockstream import (load_blockstream, BS3Error, BS3DataBlockHeader,
                          USE_PROCESS)
 
@@ -47,7 +49,14 @@ if USE_PROCESS is True:
 else:
     from threading import Thread as ParalellBase, Event
     from Queue import Queue
-from Queue import Empty
+from Queue import Empty, Full
+
+##---CONSTANTS
+
+LOG = logging.getLogger(__name__)
+BATCH_LATENCY = 0.01
+READ_TIMEOUT = 1000
+BATCH_READ_TIMEOUT = 10
 
 ##---CLASSES
 
@@ -73,7 +82,8 @@ class BS3Reader(ParalellBase):
 
     ## constructor
 
-    def __init__(self, protocol_handler_cls, out_q, verbose=False, ident='?'):
+    def __init__(self, protocol_handler_cls, out_q, verbose=False, ident='?',
+                 batch_size=1):
         """
         :Parameters:
             protocol : str
@@ -87,6 +97,12 @@ class BS3Reader(ParalellBase):
                 Default=False
             ident : str
                 identification string will be found in control.. or so
+            batch_size : int
+                if > 1, blocks are put to out_q as lists of up to batch_size
+                blocks. A partial batch is put with the first block that
+                arrives BATCH_LATENCY seconds after the batch was started,
+                after a poll without a block and on shutdown.
+                Default=1
         """
 
         # super for thread
@@ -101,13 +117,14 @@ class BS3Reader(ParalellBase):
         self._is_serving.clear()
         self._is_muted = Event()
         self._is_muted.clear()
-        self._mute_state = False
         self._bs_lib = None
         self._verbose = bool(verbose)
         self._protocol_handler_cls = protocol_handler_cls
         self._handler = None
         self._reader_id = None
         self._out_q = out_q
+        self._batch_size = int(batch_size)
+        self._log = None
 
     ## blockstream
 
@@ -117,17 +134,17 @@ class BS3Reader(ParalellBase):
         self._bs_lib = load_blockstream(self._ident)
         self._reader_id = self._bs_lib.startReader(
             self._ident, self._protocol_handler_cls.PROTOCOL)
-        if self._verbose:
-            print 'reader id:', self._reader_id
-            print 'libhandle:', self._bs_lib
+        log = self._log or LOG
+        log.debug('reader id: %s', self._reader_id)
+        log.debug('libhandle: %s', self._bs_lib)
 
     def stop_blockstream(self):
         """frees the resources allocated from the library"""
 
         if self._bs_lib is not None:
             self._bs_lib.finalizeReader(self._reader_id)
-            if self._verbose:
-                print 'finalized reader id:', self._reader_id
+            (self._log or LOG).debug('finalized reader id: %s',
+                                     self._reader_id)
             self._reader_id = None
 
     ## parallel interface
@@ -135,72 +152,127 @@ class BS3Reader(ParalellBase):
     def run(self):
         """polls for new data and relays to self._out_q"""
 
-        # setup stuff
+        # setup stuff, each reader logs to its own child of LOG. verbose
+        # readers log their activity to stderr for the time they are running
+        log = self._log = logging.getLogger('%s.%s' % (__name__, self._ident))
+        verbose_handler = None
+        if self._verbose:
+            verbose_handler = logging.StreamHandler()
+            log.addHandler(verbose_handler)
+            log.setLevel(logging.DEBUG)
+            log.propagate = False
         self._handler = self._protocol_handler_cls()
         self.start_blockstream()
         self._is_serving.set()
         self._is_shutdown.clear()
 
-        # doomsday loop
-        if self._verbose:
-            print 'starting doomsday loop'
-        while self._is_serving.is_set():
-            # mute toggle?
-            if self._is_muted.is_set() != self._mute_state:
-                self._mute_state = not self._mute_state
-                self._bs_lib.setReaderActive(self._reader_id,
-                                             not self._mute_state)
-                if self._verbose:
-                    print 'setReaderActive(%d,%s)' % (
-                        self._reader_id, not self._mute_state)
-
-            # receive data by polling library
-            i64_latency = c_int64()
-            i64_blocksize = c_int64()
-            car_data = POINTER(c_char)()
-            # bool readBlock(const int16 readerID,
-            #                int64* latency
-            #                int64* blockSize,
-            #                const void** data,
-            #                int16 timeout);
-            b_got_block = self._bs_lib.readBlock(self._reader_id,
-                                                 byref(i64_latency),
-                                                 byref(i64_blocksize),
-                                                 byref(car_data),
-                                                 1000)
-
-            # handle data by building blocks
-            if b_got_block:
-                # we received a block
-                if self._verbose:
-                    print 'incoming[%s][%s]' % (
-                        i64_latency.value, i64_blocksize.value)
-                if i64_blocksize.value < BS3DataBlockHeader.__len__():
-                    raise BS3Error('bad block size!')
-                data = str(car_data[:i64_blocksize.value])
-
-                # lets get the block header
-                at = BS3DataBlockHeader.__len__()
-                block_header = BS3DataBlockHeader.from_data(data[:at])
-
-                # call on block ready
-                protocol_block = self._handler.on_block_ready(block_header,
-                                                              data[at:])
-                if protocol_block is not None:
-                    self._out_q.put(protocol_block)
+        # ctypes containers for readBlock, reused for every block
+        i64_latency = c_int64()
+        i64_blocksize = c_int64()
+        car_data = POINTER(c_char)()
+        p_latency = byref(i64_latency)
+        p_blocksize = byref(i64_blocksize)
+        p_data = byref(car_data)
+        debug = log.isEnabledFor(logging.DEBUG)
+
+        # loop invariants
+        read_block = self._bs_lib.readBlock
+        release_block = self._bs_lib.releaseBlock
+        reader_id = self._reader_id
+        hdr_len = BS3DataBlockHeader.SIZE
+        on_block_ready = self._handler.on_block_ready
+        header_from_data = BS3DataBlockHeader.from_data
+        put_block = self._out_q.put
+        set_active = self._bs_lib.setReaderActive
+        is_serving = self._is_serving.is_set
+        is_muted = self._is_muted.is_set
+        muted = False
+        batch_size = self._batch_size
+        batch = []
+        batch_start = 0.0
+
+        try:
+            # doomsday loop
+            if debug:
+                log.debug('starting doomsday loop')
+            while is_serving():
+                # mute toggle?
+                if is_muted() is not muted:
+                    muted = not muted
+                    set_active(reader_id, not muted)
+                    if debug:
+                        log.debug('setReaderActive(%d,%s)', reader_id,
+                                  not muted)
+
+                # receive data by polling library, wait only briefly while a
+                # partial batch is pending
+                b_got_block = read_block(reader_id,
+                                         p_latency,
+                                         p_blocksize,
+                                         p_data,
+                                         BATCH_READ_TIMEOUT if batch else
+                                         READ_TIMEOUT)
+
+                # handle data by building blocks
+                if b_got_block:
+                    block_size = i64_blocksize.value
+                    if debug:
+                        log.debug('incoming[%s][%s]', i64_latency.value,
+                                  block_size)
+                    if block_size < hdr_len:
+                        raise BS3Error('bad block size!')
+                    # copy the block out of library memory exactly once, the
+                    # decoded blocks keep views into data and outlive the
+                    # releaseBlock call below
+                    data = string_at(car_data, block_size)
+
+                    # lets get the block header
+                    block_header = header_from_data(data)
+
+                    # call on block ready, the handler gets a read-only buffer
+                    # into data instead of a copy of the block body
+                    protocol_block = on_block_ready(block_header,
+                                                    buffer(data, hdr_len))
+                    if protocol_block is None:
+                        if debug:
+                            log.debug('no push of bad block')
+                    elif batch_size > 1:
+                        if not batch:
+                            batch_start = time()
+                        batch.append(protocol_block)
+                        if (len(batch) >= batch_size or
+                            time() - batch_start > BATCH_LATENCY):
+                            put_block(batch)
+                            batch = []
+                    else:
+                        put_block(protocol_block)
+
+                    # release block
+                    release_block(reader_id)
                 else:
-                    if self._verbose:
-                        print 'no push of bad block'
-
-                # release block
-                self._bs_lib.releaseBlock(self._reader_id)
-
-        # proper shutdown code here
-        if self._verbose:
-            print 'left doomsday loop'
-        self.stop_blockstream()
-        self._out_q.put_nowait(None)
-        self._is_shutdown.set()
+                    # idle poll, do not hold back a partial batch
+                    if batch:
+                        put_block(batch)
+                        batch = []
+        finally:
+            # proper shutdown code here, also when the loop failed
+            if debug:
+                log.debug('left doomsday loop')
+            self.stop_blockstream()
+            try:
+                if batch:
+                    self._out_q.put_nowait(batch)
+                    batch = []
+                self._out_q.put_nowait(None)
+            except Full:
+                # a full bounded queue must not keep stop() waiting
+                log.warning('could not put end of stream marker, dropped %d '
+                            'pending blocks', len(batch))
+            if verbose_handler is not None:
+                log.removeHandler(verbose_handler)
+                log.setLevel(logging.NOTSET)
+                log.propagate = True
+            self._is_shutdown.set()
 
     def stop(self):
         """stop the thread"""
@@ -36,17 +36,73 @@ __all__ = ['BS3BxpdBlockHeader', 'BS3BxpdBaseBlock', 'BS3BxpdSetupBlock',
 
 ##---IMPORTS
 
-from struct import pack, unpack, calcsize
-from blockstream import BS3BaseHeader, BS3BaseBlock
-from bs_reader import ProtocolHandler, Queue, BS3Reader, USE_PROCESS
+import logging
+from struct import Struct, error as StructError
+import scipy as sp
+from blockstream import (BS3BaseHeader, BS3BaseBlock, BUFFER_TYPES,
+                         get_struct)
+from bs_reader import ProtocolHandler
+
+##---CONSTANTS
+
+LOG = logging.getLogger(__name__)
+_U8 = Struct('<B')
+_U16 = Struct('<H')
+_U32 = Struct('<I')
+_U64 = Struct('<Q')
+_QQ = Struct('<QQ')
+_HBH = Struct('<HBH')
+_EVENT_DT = sp.dtype([('chan_nr', '<u2'),
+                      ('time', '<u8'),
+                      ('event_type', 'u1')])
+
+##---FUNCTIONS
+
+def _chan_lst_from_data(data, at):
+    """read a channel descriptor list from data at offset at
+
+    :Returns:
+        list of (channr, srate_idx, name_len, name) and the offset behind it
+    """
+
+    chan_lst = []
+    nchan, = _U16.unpack_from(data, at)
+    at += 2
+    for _ in xrange(nchan):
+        ch_nr, sr_idx, nlen = _HBH.unpack_from(data, at)
+        at += _HBH.size
+        chan_lst.append((ch_nr, sr_idx, nlen, str(data[at:at + nlen])))
+        at += nlen
+    return chan_lst, at
+
+
+def _chan_lst_pack_into(buf, at, chan_lst):
+    """write a channel descriptor list into buf at offset at
+
+    :Returns:
+        the offset behind the written list
+    """
+
+    _U16.pack_into(buf, at, len(chan_lst))
+    at += 2
+    for chan in chan_lst:
+        _HBH.pack_into(buf, at, *chan[:3])
+        at += _HBH.size
+        buf[at:at + len(chan[3])] = chan[3]
+        at += len(chan[3])
+    return at
 
 ##---CLASSES
 
 class BS3BxpdBlockHeader(BS3BaseHeader):
     """header for a datablock of type BXPD from the blockstream protocol"""
 
+    __slots__ = ('block_type',)
+
     version = 3
     signature = '<BB'
+    _struct = get_struct(signature)
+    SIZE = _struct.size
 
     def __init__(self, block_type):
         """
@@ -58,7 +114,10 @@ class BS3BxpdBlockHeader(BS3BaseHeader):
         self.block_type = int(block_type)
 
     def payload(self):
-        return pack(self.signature, self.version, self.block_type)
+        return self._struct.pack(self.version, self.block_type)
+
+    def pack_into(self, buf, offset):
+        self._struct.pack_into(buf, offset, self.version, self.block_type)
 
     def __str__(self):
         return '[$%s]' % self.block_type
@@ -67,13 +126,13 @@ class BS3BxpdBlockHeader(BS3BaseHeader):
     def from_data(data):
         """build from data"""
 
-        if not isinstance(data, str):
-            raise TypeError('needs a sting as input!')
-        if len(data) < BS3BxpdBlockHeader.__len__():
+        if not isinstance(data, BUFFER_TYPES):
+            raise TypeError('needs a str or buffer as input!')
+        try:
+            ver, btp = BS3BxpdBlockHeader._struct.unpack_from(data, 0)
+        except StructError:
             raise ValueError(
-                'data must have len >= %s' % BS3BxpdBlockHeader.__len__())
-        ver, btp = unpack(BS3BxpdBlockHeader.signature,
-                          data[:BS3BxpdBlockHeader.__len__()])
+                'data must have len >= %s' % BS3BxpdBlockHeader.SIZE)
         if ver != BS3BxpdBlockHeader.version:
             raise ValueError('invalid protocol version(%s)!' % ver)
         return BS3BxpdBlockHeader(btp)
@@ -136,31 +195,42 @@ class BS3BxpdSetupBlock(BS3BxpdBaseBlock):
         self.dichan_lst = list(dichan_lst)
         self.evchan_lst = list(evchan_lst)
         self.group_lst = list(group_lst)
-        self.anchan_index_mapping = {}
-        for i in xrange(len(self.anchan_lst)):
-            self.anchan_index_mapping[self.anchan_lst[i][0]] = i
+        self.anchan_index_mapping = dict(
+            (anchan[0], i) for i, anchan in enumerate(self.anchan_lst))
 
     def payload(self):
-        rval = ''
-        rval += self.header.payload()
-        rval += pack('<B%dd' % len(self.srate_lst), len(self.srate_lst),
-                     *self.srate_lst)
-        rval += pack('<H', len(self.anchan_lst))
-        for anchan in self.anchan_lst:
-            rval += pack('<HBH%ds' % len(anchan[3]), *anchan)
-        rval += pack('<H', len(self.dichan_lst))
-        for dichan in self.dichan_lst:
-            rval += pack('<HBH%ds' % len(dichan[3]), *dichan)
-        rval += pack('<H', len(self.evchan_lst))
-        for evchan in self.evchan_lst:
-            rval += pack('<HBH%ds' % len(evchan[3]), *evchan)
-        rval += pack('<H', len(self.group_lst))
+        rval = bytearray(len(self))
+        self.header.pack_into(rval, 0)
+        at = len(self.header)
+        _U8.pack_into(rval, at, len(self.srate_lst))
+        at += 1
+        srate_fmt = get_struct('<%dd' % len(self.srate_lst))
+        srate_fmt.pack_into(rval, at, *self.srate_lst)
+        at += srate_fmt.size
+        at = _chan_lst_pack_into(rval, at, self.anchan_lst)
+        at = _chan_lst_pack_into(rval, at, self.dichan_lst)
+        at = _chan_lst_pack_into(rval, at, self.evchan_lst)
+        _U16.pack_into(rval, at, len(self.group_lst))
+        at += 2
         for group in self.group_lst:
-            rval += pack('<H%dsH%dH' % (len(group[1]), len(group[3])), *group)
-        return rval
+            _U16.pack_into(rval, at, group[0])
+            at += 2
+            rval[at:at + len(group[1])] = group[1]
+            at += len(group[1])
+            _U16.pack_into(rval, at, group[2])
+            at += 2
+            rval[at:at + 2 * len(group[3])] = sp.asarray(
+                group[3], dtype='<u2').tostring()
+            at += 2 * len(group[3])
+        return str(rval)
 
     def __len__(self):
-        return len(self.payload())
+        chan_len = sum(5 + len(chan[3]) for chan in
+                       self.anchan_lst + self.dichan_lst + self.evchan_lst)
+        group_len = sum(4 + len(group[1]) + 2 * len(group[3])
+                        for group in self.group_lst)
+        return (len(self.header) + 1 + 8 * len(self.srate_lst) + 6 +
+                chan_len + 2 + group_len)
 
     def __str__(self):
         super_str = super(BS3BxpdSetupBlock, self).__str__()
@@ -172,60 +242,33 @@ class BS3BxpdSetupBlock(BS3BxpdBaseBlock):
     def from_data(data, header=None):
         """build from data"""
 
-        if not isinstance(data, str):
-            raise TypeError('needs a sting as input!')
+        if not isinstance(data, BUFFER_TYPES):
+            raise TypeError('needs a str or buffer as input!')
         at = 0
 
         srate_lst = []
-        nsrate, = unpack('<B', data[at:at + 1])
+        nsrate, = _U8.unpack_from(data, at)
         at += 1
         if nsrate > 0:
-            srates = unpack('%dd' % nsrate,
-                            data[at:at + calcsize('%dd' % nsrate)])
-            at += calcsize('%dd' % nsrate)
+            srate_fmt = get_struct('<%dd' % nsrate)
+            srates = srate_fmt.unpack_from(data, at)
+            at += srate_fmt.size
             srate_lst = list(srates)
-        anchan_lst = []
-        nanchan, = unpack('<H', data[at:at + 2])
-        at += 2
-        if nanchan > 0:
-            for _ in xrange(nanchan):
-                ch_nr, sr_idx, nlen = unpack('<HBH', data[at:at + 5])
-                at += 5
-                name, = unpack('<%ds' % nlen, data[at:at + nlen])
-                at += nlen
-                anchan_lst.append((ch_nr, sr_idx, nlen, name))
-        dichan_lst = []
-        ndichan, = unpack('<H', data[at:at + 2])
-        at += 2
-        if ndichan > 0:
-            for _ in xrange(ndichan):
-                ch_nr, sr_idx, nlen = unpack('<HBH', data[at:at + 5])
-                at += 5
-                name, = unpack('<%ds' % nlen, data[at:at + nlen])
-                at += nlen
-                dichan_lst.append((ch_nr, sr_idx, nlen, name))
-        evchan_lst = []
-        nevchan, = unpack('<H', data[at:at + 2])
-        at += 2
-        if nevchan > 0:
-            for _ in xrange(nevchan):
-                ch_nr, sr_idx, nlen = unpack('<HBH', data[at:at + 5])
-                at += 5
-                name, = unpack('<%ds' % nlen, data[at:at + nlen])
-                at += nlen
-                evchan_lst.append((ch_nr, sr_idx, nlen, name))
+        anchan_lst, at = _chan_lst_from_data(data, at)
+        dichan_lst, at = _chan_lst_from_data(data, at)
+        evchan_lst, at = _chan_lst_from_data(data, at)
         group_lst = []
-        ngroup, = unpack('<H', data[at:at + 2])
+        ngroup, = _U16.unpack_from(data, at)
         at += 2
         if ngroup > 0:
             for _ in xrange(ngroup):
-                nlen, = unpack('<H', data[at:at + 2])
+                nlen, = _U16.unpack_from(data, at)
                 at += 2
-                name, = unpack('<%ds' % nlen, data[at:at + nlen])
+                name = str(data[at:at + nlen])
                 at += nlen
-                grp_sz, = unpack('<H', data[at:at + 2])
+                grp_sz, = _U16.unpack_from(data, at)
                 at += 2
-                channels = unpack('<%dH' % grp_sz, data[at:at + 2 * grp_sz])
+                channels = get_struct('<%dH' % grp_sz).unpack_from(data, at)
                 at += 2 * grp_sz
                 group_lst.append((nlen, name, grp_sz, channels))
         return BS3BxpdSetupBlock(
@@ -253,9 +296,12 @@ class BS3BxpdDataBlock(BS3BxpdBaseBlock):
                 (start, end) of chunks in mu_sec
             srate_lst : list
                 list of sample offsets per sample rate of the setupblock :: uint64.
-            anchan_lst : list
+            anchan_lst : list or ndarray
                 list of analog channel chunks. entry:
-                     values::int16[]
+                     values::ndarray(int16)
+                if all chunks have the same length, pass them as one
+                ndarray(int16) of shape (nanchan, nsample), it is kept as
+                anchan_arr and anchan_lst holds its rows
             dichan_lst : list
                 list of digital channel chunks. entry:
                     (chan_nr::uint16,
@@ -276,32 +322,52 @@ class BS3BxpdDataBlock(BS3BxpdBaseBlock):
         # members
         self.time_stamp = tuple(time_stamp)
         self.srate_lst = list(srate_lst)
+        self.anchan_arr = None
+        if isinstance(anchan_lst, sp.ndarray) and anchan_lst.ndim == 2:
+            self.anchan_arr = anchan_lst
         self.anchan_lst = list(anchan_lst)
         self.dichan_lst = list(dichan_lst)
         self.evchan_lst = list(evchan_lst)
 
     def payload(self):
-        rval = ''
-        rval += self.header.payload()
-        rval += pack('<QQ', *self.time_stamp)
-        rval += pack('<B%dQ', len(self.srate_lst), *self.srate_lst)
+        rval = bytearray(len(self))
+        self.header.pack_into(rval, 0)
+        at = len(self.header)
+        _QQ.pack_into(rval, at, *self.time_stamp)
+        at += 16
+        _U8.pack_into(rval, at, len(self.srate_lst))
+        at += 1
+        rval[at:at + 8 * len(self.srate_lst)] = sp.asarray(
+            self.srate_lst, dtype='<u8').tostring()
+        at += 8 * len(self.srate_lst)
+        _U16.pack_into(rval, at, len(self.anchan_lst))
+        at += 2
         for anchan in self.anchan_lst:
             anchan_len = len(anchan)
-            if anchan_len < 256:
-                rval += pack('<B', anchan_len)
+            if anchan_len < 255:
+                _U8.pack_into(rval, at, anchan_len)
+                at += 1
             else:
-                rval += pack('<BQ', 255, anchan_len)
-            rval += pack('<%di' % len(anchan), *anchan)
-        rval += pack('<I', len(self.dichan_lst))
-        for dichan in self.dichan_lst:
-            rval += pack('<HQB', *dichan)
-        rval += pack('<I', len(self.evchan_lst))
-        for evchan in self.evchan_lst:
-            rval += pack('<HQB', *evchan)
-        return rval
+                _U8.pack_into(rval, at, 255)
+                _U64.pack_into(rval, at + 1, anchan_len)
+                at += 9
+            rval[at:at + 2 * anchan_len] = sp.asarray(
+                anchan, dtype='<i2').tostring()
+            at += 2 * anchan_len
+        for event_lst in [self.dichan_lst, self.evchan_lst]:
+            _U32.pack_into(rval, at, len(event_lst))
+            at += 4
+            rval[at:at + 11 * len(event_lst)] = sp.array(
+                map(tuple, event_lst), dtype=_EVENT_DT).tostring()
+            at += 11 * len(event_lst)
+        return str(rval)
 
     def __len__(self):
-        return len(self.payload())
+        anchan_len = sum((1 if len(anchan) < 255 else 9) + 2 * len(anchan)
+                         for anchan in self.anchan_lst)
+        return (len(self.header) + 16 + 1 + 8 * len(self.srate_lst) + 2 +
+                anchan_len + 4 + 11 * len(self.dichan_lst) + 4 +
+                11 * len(self.evchan_lst))
 
     def __str__(self):
         super_str = super(BS3BxpdDataBlock, self).__str__()
@@ -315,49 +381,61 @@ class BS3BxpdDataBlock(BS3BxpdBaseBlock):
     def from_data(data, header=None):
         """build from data"""
 
-        if not isinstance(data, str):
-            raise TypeError('needs a sting as input!')
+        if not isinstance(data, BUFFER_TYPES):
+            raise TypeError('needs a str or buffer as input!')
         at = 0
 
-        time_stamp = unpack('<QQ', data[at:at + 16])
+        time_stamp = _QQ.unpack_from(data, at)
         at += 16
         srate_lst = []
-        nsrate, = unpack('<B', data[at:at + 1])
+        nsrate, = _U8.unpack_from(data, at)
         at += 1
         if nsrate > 0:
-            srates = unpack('%dQ' % nsrate, data[at:at + 8 * nsrate])
+            srates = get_struct('<%dQ' % nsrate).unpack_from(data, at)
             at += 8 * nsrate
             srate_lst = list(srates)
         anchan_lst = []
-        nanchan, = unpack('<H', data[at:at + 2])
+        anchan_arr = None
+        nanchan, = _U16.unpack_from(data, at)
         at += 2
         if nanchan > 0:
-            for _ in xrange(nanchan):
-                anchan_len, = unpack('<B', data[at:at + 1])
-                at += 1
-                if anchan_len == 255:
-                    anchan_len, = unpack('<Q', data[at:at + 8])
-                    at += 8
-                values = unpack('<%dh' % anchan_len,
-                                data[at:at + anchan_len * 2])
-                at += anchan_len * 2
-                anchan_lst.append(values)
-        dichan_lst = []
-        ndichan, = unpack('<I', data[at:at + 4])
+            # equal length chunks with a short length prefix are evenly
+            # strided in data, check all prefixes at once and view the
+            # samples as one array without a copy
+            nsample, = _U8.unpack_from(data, at)
+            stride = 1 + 2 * nsample
+            if nsample < 255 and at + nanchan * stride <= len(data):
+                prefixes = sp.ndarray((nanchan,), dtype=sp.uint8,
+                                      buffer=data, offset=at,
+                                      strides=(stride,))
+                if (prefixes == nsample).all():
+                    anchan_arr = sp.ndarray((nanchan, nsample),
+                                            dtype=sp.int16, buffer=data,
+                                            offset=at + 1,
+                                            strides=(stride, 2))
+                    anchan_lst = anchan_arr
+                    at += nanchan * stride
+            if anchan_arr is None:
+                for _ in xrange(nanchan):
+                    anchan_len, = _U8.unpack_from(data, at)
+                    at += 1
+                    if anchan_len == 255:
+                        anchan_len, = _U64.unpack_from(data, at)
+                        at += 8
+                    values = sp.frombuffer(data, dtype=sp.int16,
+                                           count=anchan_len, offset=at)
+                    at += anchan_len * 2
+                    anchan_lst.append(values)
+        ndichan, = _U32.unpack_from(data, at)
         at += 4
-        if ndichan > 0:
-            for _ in xrange(ndichan):
-                ch_nr, t_val, e_typ = unpack('<HQB', data[at:at + 11])
-                at += 11
-                dichan_lst.append((ch_nr, t_val, e_typ))
-        evchan_lst = []
-        nevchan, = unpack('<I', data[at:at + 4])
+        dichan_lst = sp.frombuffer(data, dtype=_EVENT_DT, count=ndichan,
+                                   offset=at).tolist()
+        at += ndichan * _EVENT_DT.itemsize
+        nevchan, = _U32.unpack_from(data, at)
         at += 4
-        if nevchan > 0:
-            for _ in xrange(nevchan):
-                ch_nr, t_val, e_typ = unpack('<HQB', data[at:at + 11])
-                at += 11
-                evchan_lst.append((ch_nr, t_val, e_typ))
+        evchan_lst = sp.frombuffer(data, dtype=_EVENT_DT, count=nevchan,
+                                   offset=at).tolist()
+        at += nevchan * _EVENT_DT.itemsize
         return BS3BxpdDataBlock(
             time_stamp,
             srate_lst,
@@ -373,20 +451,22 @@ class BXPDProtocolHandler(ProtocolHandler):
 
     def on_block_ready(self, block_header, block_data):
         if block_header.block_code == self.PROTOCOL:
-            at = BS3BxpdBlockHeader.__len__()
-            prot_header = BS3BxpdBlockHeader.from_data(block_data[:at])
+            at = BS3BxpdBlockHeader.SIZE
+            prot_header = BS3BxpdBlockHeader.from_data(block_data)
             prot_block = None
             if prot_header.block_type == 0:
-                prot_block = BS3BxpdSetupBlock.from_data(block_data[at:])
+                prot_block = BS3BxpdSetupBlock.from_data(
+                    buffer(block_data, at))
             elif prot_header.block_type == 1:
-                prot_block = BS3BxpdDataBlock.from_data(block_data[at:])
+                prot_block = BS3BxpdDataBlock.from_data(
+                    buffer(block_data, at))
             else:
-                print 'unknown block_code: %s::%s' % (
-                    block_header, prot_header)
+                LOG.warning('unknown block_code: %s::%s', block_header,
+                            prot_header)
             return prot_block
         else:
             # other blocks -- what is wrong here?
-            print 'received block for other protocol! %s' % block_header
+            LOG.warning('received block for other protocol! %s', block_header)
             return None
 
 PROT = {'H': BS3BxpdBlockHeader,
@@ -398,6 +478,8 @@ PROT = {'H': BS3BxpdBlockHeader,
 
 def test_single(n=100):
     try:
+        from bs_reader import Queue, BS3Reader, USE_PROCESS
+
         Q = Queue()
         bs_reader = BS3Reader(BXPDProtocolHandler, Q, verbose=False,
                               ident='TestBXPD')
@@ -40,18 +40,29 @@ __all__ = ['BS3CoveBlockHeader', 'BS3CoveBaseBlock', 'BS3CoveDataBlock',
 
 ##---IMPORTS
 
-from struct import pack, unpack
+import logging
+from struct import Struct, error as StructError
 import scipy as sp
-from blockstream import BS3BaseHeader, BS3BaseBlock
+from blockstream import (BS3BaseHeader, BS3BaseBlock, BUFFER_TYPES,
+                         get_struct)
 from bs_reader import ProtocolHandler
 
+##---CONSTANTS
+
+LOG = logging.getLogger(__name__)
+_HCHH = Struct('<HcHH')
+
 ##---CLASSES
 
 class BS3CoveBlockHeader(BS3BaseHeader):
     """header for a datablock of type COVE from the blockstream protocol"""
 
+    __slots__ = ('block_type',)
+
     version = 1
     signature = '<BB'
+    _struct = get_struct(signature)
+    SIZE = _struct.size
 
     def __init__(self, block_type):
         """
@@ -63,7 +74,10 @@ class BS3CoveBlockHeader(BS3BaseHeader):
         self.block_type = int(block_type)
 
     def payload(self):
-        return pack(self.signature, self.version, self.block_type)
+        return self._struct.pack(self.version, self.block_type)
+
+    def pack_into(self, buf, offset):
+        self._struct.pack_into(buf, offset, self.version, self.block_type)
 
     def __str__(self):
         return '[$%s]' % self.block_type
@@ -72,13 +86,13 @@ class BS3CoveBlockHeader(BS3BaseHeader):
     def from_data(data):
         """build from data"""
 
-        if not isinstance(data, str):
-            raise TypeError('needs a sting as input!')
-        if len(data) < BS3CoveBlockHeader.__len__():
+        if not isinstance(data, BUFFER_TYPES):
+            raise TypeError('needs a str or buffer as input!')
+        try:
+            ver, btp = BS3CoveBlockHeader._struct.unpack_from(data, 0)
+        except StructError:
             raise ValueError(
-                'data must have len >= %s' % BS3CoveBlockHeader.__len__())
-        ver, btp = unpack(BS3CoveBlockHeader.signature,
-                          data[:BS3CoveBlockHeader.__len__()])
+                'data must have len >= %s' % BS3CoveBlockHeader.SIZE)
         if ver != BS3CoveBlockHeader.version:
             raise ValueError('invalid protocol version(%s)!' % ver)
         return BS3CoveBlockHeader(btp)
@@ -114,17 +128,21 @@ class BS3CoveDataBlock(BS3CoveBaseBlock):
         self.data_lst = list(data_lst)
 
     def payload(self):
-        rval = ''
-        rval += self.header.payload()
-
-        grp_idx, kind, nc, tf = self.data_lst[:4]
-        rval += pack('<HcHH', grp_idx, kind, nc, tf)
-        rval += self.data_lst[4].satype(sp.float32).tostring()
-        rval += self.data_lst[5].astype(sp.float32).tostring()
-        return rval
+        rval = bytearray(len(self))
+        self.header.pack_into(rval, 0)
+        at = len(self.header)
+        _HCHH.pack_into(rval, at, *self.data_lst[:4])
+        at += _HCHH.size
+        xcorrs = sp.asarray(self.data_lst[4], dtype='<f4').tostring()
+        rval[at:at + len(xcorrs)] = xcorrs
+        at += len(xcorrs)
+        rval[at:] = sp.asarray(self.data_lst[5], dtype='<f4').tostring()
+        return str(rval)
 
     def __len__(self):
-        return len(self.payload())
+        nc, tf = self.data_lst[2:4]
+        return (len(self.header) + _HCHH.size +
+                4 * nc * nc * (2 * tf - 1) + 4 * (tf * nc) ** 2)
 
     def __str__(self):
         super_str = super(BS3CoveDataBlock, self).__str__()
@@ -134,25 +152,24 @@ class BS3CoveDataBlock(BS3CoveBaseBlock):
     def from_data(data, header=None):
         """build from data"""
 
-        if not isinstance(data, str):
-            raise TypeError('needs a sting as input!')
+        if not isinstance(data, BUFFER_TYPES):
+            raise TypeError('needs a str or buffer as input!')
         at = 0
 
         # begin to build package
-        grp_idx, kind, nc, tf = unpack('<HcHH', data[at:at + 7])
+        grp_idx, kind, nc, tf = _HCHH.unpack_from(data, at)
         data_lst = [grp_idx, kind, nc, tf]
         tf_nc = tf * nc
-        at += 7
+        at += _HCHH.size
 
-        xcoors = sp.frombuffer(data[at:at + (nc * nc * (tf * 2 - 1) * 4)],
-                               dtype=sp.float32)
-        xcoors.shape = (nc * nc, 2 * tf - 1)
+        xcoors = sp.frombuffer(data, dtype=sp.float32,
+                               count=nc * nc * (tf * 2 - 1),
+                               offset=at).reshape(nc * nc, 2 * tf - 1)
         data_lst.append(xcoors)
         at += nc * nc * (tf * 2 - 1) * 4
 
-        cov = sp.frombuffer(data[at:at + (tf_nc * tf_nc * 4)],
-                            dtype=sp.float32)
-        cov.shape = (tf_nc, tf_nc)
+        cov = sp.frombuffer(data, dtype=sp.float32, count=tf_nc * tf_nc,
+                            offset=at).reshape(tf_nc, tf_nc)
         data_lst.append(cov)
 
         return BS3CoveDataBlock(data_lst, header=header)
@@ -164,18 +181,17 @@ class COVEProtocolHandler(ProtocolHandler):
 
     def on_block_ready(self, block_header, block_data):
         if block_header.block_code == self.PROTOCOL:
-            at = BS3CoveBlockHeader.__len__()
-            prot_header = BS3CoveBlockHeader.from_data(block_data[:at])
-            prot_block = None
-            if prot_header.block_type == 0:
-                prot_block = BS3CoveDataBlock.from_data(block_data[at:])
-            else:
-                print 'unknown block_code: %s::%s' % (
-                    block_header, prot_header)
-            return prot_block
+            at = BS3CoveBlockHeader.SIZE
+            prot_header = BS3CoveBlockHeader.from_data(block_data)
+            prot_cls = PROT.get(prot_header.block_type)
+            if prot_cls is None:
+                LOG.warning('unknown block_code: %s::%s', block_header,
+                            prot_header)
+                return None
+            return prot_cls.from_data(buffer(block_data, at))
         else:
             # other blocks -- what is wrong here?
-            print 'received block for other protocol! %s' % block_header
+            LOG.warning('received block for other protocol! %s', block_header)
             return None
 
 PROT = {'H': BS3CoveBlockHeader,
@@ -36,21 +36,37 @@
 """protocol for the position information and steering of recoding devices"""
 __docformat__ = 'restructuredtext'
 __all__ = ['BS3PosiBlockHeader', 'BS3PosiBaseBlock', 'BS3PosiSetupBlock',
-           'BS3PosiDataBlock', 'BS3PosiSteerBlock', 'POSIProtocolHandler']
+           'BS3PosiGroupBlock', 'BS3PosiDataBlock', 'BS3PosiSteerBlock',
+           'POSIProtocolHandler']
 
 ##---IMPORTS
 
-from struct import pack, unpack
-from blockstream import BS3BaseHeader, BS3BaseBlock
+import logging
+from struct import Struct, error as StructError
+import scipy as sp
+from blockstream import (BS3BaseHeader, BS3BaseBlock, BUFFER_TYPES,
+                         get_struct)
 from bs_reader import ProtocolHandler
 
+##---CONSTANTS
+
+LOG = logging.getLogger(__name__)
+_U16 = Struct('<H')
+_HQ = Struct('<HQ')
+_GRP_DT = sp.dtype([('group_nr', '<u2'),
+                    ('position', '<u8')])
+
 ##---CLASSES
 
 class BS3PosiBlockHeader(BS3BaseHeader):
     """header for a datablock of type POSI from the blockstream protocol"""
 
+    __slots__ = ('block_type',)
+
     version = 1
     signature = '<BB'
+    _struct = get_struct(signature)
+    SIZE = _struct.size
 
     def __init__(self, block_type):
         """
@@ -63,7 +79,10 @@ class BS3PosiBlockHeader(BS3BaseHeader):
         self.block_type = int(block_type)
 
     def payload(self):
-        return pack(self.signature, self.version, self.block_type)
+        return self._struct.pack(self.version, self.block_type)
+
+    def pack_into(self, buf, offset):
+        self._struct.pack_into(buf, offset, self.version, self.block_type)
 
     def __str__(self):
         return '[$%s]' % self.block_type
@@ -72,13 +91,13 @@ class BS3PosiBlockHeader(BS3BaseHeader):
     def from_data(data):
         """build from data"""
 
-        if not isinstance(data, str):
-            raise TypeError('needs a sting as input!')
-        if len(data) < BS3PosiBlockHeader.__len__():
+        if not isinstance(data, BUFFER_TYPES):
+            raise TypeError('needs a str or buffer as input!')
+        try:
+            ver, btp = BS3PosiBlockHeader._struct.unpack_from(data, 0)
+        except StructError:
             raise ValueError(
-                'data must have len >= %s' % BS3PosiBlockHeader.__len__())
-        ver, btp = unpack(BS3PosiBlockHeader.signature,
-                          data[:BS3PosiBlockHeader.__len__()])
+                'data must have len >= %s' % BS3PosiBlockHeader.SIZE)
         if ver != BS3PosiBlockHeader.version:
             raise ValueError('invalid protocol version(%s)!' % ver)
         return BS3PosiBlockHeader(btp)
@@ -110,151 +129,109 @@ class BS3PosiSetupBlock(BS3PosiBaseBlock):
         self.group_lst = list(group_lst)
 
     def payload(self):
-        rval = ''
-        rval += self.header.payload()
-        rval += pack('<H', len(self.group_lst))
-        for group in self.group_lst:
-            grp_idx, = group
-            rval += pack('<H', grp_idx)
-        return rval
+        ngroup = len(self.group_lst)
+        rval = bytearray(len(self))
+        self.header.pack_into(rval, 0)
+        at = len(self.header)
+        _U16.pack_into(rval, at, ngroup)
+        at += 2
+        get_struct('<%dH' % ngroup).pack_into(
+            rval, at, *[grp_idx for grp_idx, in self.group_lst])
+        return str(rval)
 
     def __len__(self):
-        return len(self.payload())
+        return len(self.header) + 2 + 2 * len(self.group_lst)
 
     def __str__(self):
         super_str = super(BS3PosiSetupBlock, self).__str__()
         return '%s::[gr:%d]' % (super_str, len(self.group_lst))
 
     @staticmethod
-    def from_data(header, data):
+    def from_data(data, header=None):
         """build from data"""
 
-        if not isinstance(data, str):
-            raise TypeError('needs a sting as input!')
+        if not isinstance(data, BUFFER_TYPES):
+            raise TypeError('needs a str or buffer as input!')
         at = 0
 
         # groups
-        group_lst = []
-        ngroup, = unpack('<H', data[at:at + 2])
+        ngroup, = _U16.unpack_from(data, at)
         at += 2
-        if ngroup > 0:
-            for _ in xrange(ngroup):
-                grp_idx, = unpack('<H', data[at:at + 2])
-                at += 2
-                group_lst.append((grp_idx,))
-        return BS3PosiSetupBlock(header, group_lst)
+        group_lst = [(grp_idx,) for grp_idx in
+                     get_struct('<%dH' % ngroup).unpack_from(data, at)]
+        return BS3PosiSetupBlock(group_lst, header=header)
 
 
-class BS3PosiDataBlock(BS3PosiBaseBlock):
-    """"POSI - datablock"""
+class BS3PosiGroupBlock(BS3PosiBaseBlock):
+    """"POSI - list of positions per group, base for data and steering"""
+
+    BLOCK_TYPE = None
 
     def __init__(self, grp_lst, header=None):
         """
         :Paramters:
-            grp_lst : list
+            grp_lst : list or ndarray
                 list of positions per group. entry:
                     (group_nr::uint16,
                      position::uint64)
+                a structured ndarray with the fields group_nr and position
+                is kept as grp_arr and grp_lst holds its records
             header : BS3PosiBlockHeader
         """
 
         # super
-        super(BS3PosiDataBlock, self).__init__(
-            header or BS3PosiBlockHeader(1))
+        super(BS3PosiGroupBlock, self).__init__(
+            header or BS3PosiBlockHeader(self.BLOCK_TYPE))
 
         # members
+        self.grp_arr = None
+        if isinstance(grp_lst, sp.ndarray):
+            self.grp_arr = grp_lst
+            grp_lst = grp_lst.tolist()
         self.grp_lst = list(grp_lst)
 
     def payload(self):
-        rval = ''
-        rval += self.header.payload()
-        rval += pack('<H', len(self.grp_lst))
-        if len(self.grp_lst) > 0:
-            for grp in self.grp_lst:
-                rval += pack('<HQ', *grp)
-        return rval
+        rval = bytearray(len(self))
+        self.header.pack_into(rval, 0)
+        at = len(self.header)
+        _U16.pack_into(rval, at, len(self.grp_lst))
+        at += 2
+        rval[at:] = sp.array(map(tuple, self.grp_lst),
+                             dtype=_GRP_DT).tostring()
+        return str(rval)
 
     def __len__(self):
-        return len(self.payload())
+        return len(self.header) + 2 + _HQ.size * len(self.grp_lst)
 
     def __str__(self):
-        super_str = super(BS3PosiDataBlock, self).__str__()
+        super_str = super(BS3PosiGroupBlock, self).__str__()
         return '%s::[ev:%d]' % (super_str, len(self.grp_lst))
 
-    @staticmethod
-    def from_data(data, header=None):
+    @classmethod
+    def from_data(cls, data, header=None):
         """build from data"""
 
-        if not isinstance(data, str):
-            raise TypeError('needs a sting as input!')
+        if not isinstance(data, BUFFER_TYPES):
+            raise TypeError('needs a str or buffer as input!')
         at = 0
 
         # events
-        grp_lst = []
-        ngrp, = unpack('<H', data[at:at + 2])
+        ngrp, = _U16.unpack_from(data, at)
         at += 2
-        if ngrp > 0:
-            for _ in xrange(ngrp):
-                grp = unpack('<HQ', data[at:at + 10])
-                at += 10
-                grp_lst.append(grp)
-        return BS3PosiDataBlock(grp_lst, header=header)
-
-
-class BS3PosiSteerBlock(BS3PosiBaseBlock):
-    """"POSI - steeringblock"""
-
-    def __init__(self, grp_lst, header=None):
-        """
-        :Paramters:
-            grp_lst : list
-                list of positions per group. entry:
-                    (group_nr::uint16,
-                     position::uint64)
-            header : BS3PosiBlockHeader
-        """
-
-        # super
-        super(BS3PosiSteerBlock, self).__init__(
-            header or BS3PosiBlockHeader(2))
+        grp_arr = sp.frombuffer(data, dtype=_GRP_DT, count=ngrp, offset=at)
+        return cls(grp_arr, header=header)
 
-        # members
-        self.grp_lst = list(grp_lst)
 
-    def payload(self):
-        rval = ''
-        rval += self.header.payload()
-        rval += pack('<H', len(self.grp_lst))
-        if len(self.grp_lst) > 0:
-            for grp in self.grp_lst:
-                rval += pack('<HQ', *grp)
-        return rval
-
-    def __len__(self):
-        return len(self.payload())
+class BS3PosiDataBlock(BS3PosiGroupBlock):
+    """"POSI - datablock"""
 
-    def __str__(self):
-        super_str = super(BS3PosiSteerBlock, self).__str__()
-        return '%s::[ev:%d]' % (super_str, len(self.grp_lst))
+    BLOCK_TYPE = 1
 
-    @staticmethod
-    def from_data(data, header=None):
-        """build from data"""
 
-        if not isinstance(data, str):
-            raise TypeError('needs a sting as input!')
-        at = 0
+class BS3PosiSteerBlock(BS3PosiGroupBlock):
+    """"POSI - steeringblock"""
 
-        # events
-        grp_lst = []
-        ngrp, = unpack('<H', data[at:at + 2])
-        at += 2
-        if ngrp > 0:
-            for _ in xrange(ngrp):
-                grp = unpack('<HQ', data[at:at + 10])
-                at += 10
-                grp_lst.append(grp)
-        return BS3PosiSteerBlock(grp_lst, header=header)
+    BLOCK_TYPE = 2
 
 ##---PROTOCOL
 
@@ -263,22 +240,17 @@ class POSIProtocolHandler(ProtocolHandler):
 
     def on_block_ready(self, block_header, block_data):
         if block_header.block_code == self.PROTOCOL:
-            at = BS3PosiBlockHeader.__len__()
-            prot_header = BS3PosiBlockHeader.from_data(block_data[:at])
-            prot_block = None
-            if prot_header.block_type == 0:
-                prot_block = BS3PosiSetupBlock.from_data(block_data[at:])
-            elif prot_header.block_type == 1:
-                prot_block = BS3PosiDataBlock.from_data(block_data[at:])
-            elif prot_header.block_type == 2:
-                prot_block = BS3PosiSteerBlock.from_data(block_data[at:])
-            else:
-                print 'unknown block_code: %s::%s' % (
-                    block_header, prot_header)
-            return prot_block
+            at = BS3PosiBlockHeader.SIZE
+            prot_header = BS3PosiBlockHeader.from_data(block_data)
+            prot_cls = PROT.get(prot_header.block_type)
+            if prot_cls is None:
+                LOG.warning('unknown block_code: %s::%s', block_header,
+                            prot_header)
+                return None
+            return prot_cls.from_data(buffer(block_data, at))
         else:
             # other blocks -- what is wrong here?
-            print 'received block for other protocol! %s' % block_header
+            LOG.warning('received block for other protocol! %s', block_header)
             return None
 
 PROT = {'H': BS3PosiBlockHeader,
@@ -41,19 +41,40 @@ __all__ = ['BS3SortBlockHeader', 'BS3SortBaseBlock', 'BS3SortSetupBlock',
 
 ##---IMPORTS
 
-from struct import pack, unpack, calcsize
+import logging
+from struct import Struct, error as StructError
 import scipy as sp
-from blockstream import BS3BaseHeader, BS3BaseBlock
+from blockstream import (BS3BaseHeader, BS3BaseBlock, BUFFER_TYPES,
+                         get_struct)
 from bs_reader import ProtocolHandler
 
+##---CONSTANTS
+
+LOG = logging.getLogger(__name__)
+_U16 = Struct('<H')
+_U32 = Struct('<I')
+_HHHH = Struct('<HHHH')
+_FBHH = Struct('<fBHH')
+_EVENT = Struct('<HIQHHH')
+_EVENT_DT = sp.dtype([('group_idx', '<u2'),
+                      ('unit_idx', '<u4'),
+                      ('time_val', '<u8'),
+                      ('event_type', '<u2'),
+                      ('user1', '<u2'),
+                      ('user2', '<u2')])
+
 
 ##---CLASSES
 
 class BS3SortBlockHeader(BS3BaseHeader):
     """header for a datablock of type SORT from the blockstream protocol"""
 
+    __slots__ = ('block_type',)
+
     version = 1
     signature = '<BB'
+    _struct = get_struct(signature)
+    SIZE = _struct.size
 
     def __init__(self, block_type):
         """
@@ -65,7 +86,10 @@ class BS3SortBlockHeader(BS3BaseHeader):
         self.block_type = int(block_type)
 
     def payload(self):
-        return pack(self.signature, self.version, self.block_type)
+        return self._struct.pack(self.version, self.block_type)
+
+    def pack_into(self, buf, offset):
+        self._struct.pack_into(buf, offset, self.version, self.block_type)
 
     def __str__(self):
         return '[$%s]' % self.block_type
@@ -74,13 +98,13 @@ class BS3SortBlockHeader(BS3BaseHeader):
     def from_data(data):
         """build from data"""
 
-        if not isinstance(data, str):
-            raise TypeError('needs a sting as input!')
-        if len(data) < BS3SortBlockHeader.__len__():
+        if not isinstance(data, BUFFER_TYPES):
+            raise TypeError('needs a str or buffer as input!')
+        try:
+            ver, btp = BS3SortBlockHeader._struct.unpack_from(data, 0)
+        except StructError:
             raise ValueError(
-                'data must have len >= %s' % BS3SortBlockHeader.__len__())
-        ver, btp = unpack(BS3SortBlockHeader.signature,
-                          data[:BS3SortBlockHeader.__len__()])
+                'data must have len >= %s' % BS3SortBlockHeader.SIZE)
         if ver != BS3SortBlockHeader.version:
             raise ValueError('invalid protocol version(%s)!' % ver)
         return BS3SortBlockHeader(btp)
@@ -125,23 +149,37 @@ class BS3SortSetupBlock(BS3SortBaseBlock):
         self.group_lst = list(group_lst)
 
     def payload(self):
-        rval = ''
-        rval += self.header.payload()
-        rval += pack('<H', len(self.group_lst))
+        rval = bytearray(len(self))
+        self.header.pack_into(rval, 0)
+        at = len(self.header)
+        _U16.pack_into(rval, at, len(self.group_lst))
+        at += 2
         for group in self.group_lst:
-            grp_idx, nc, tf, cl = group[:4]
-            rval += pack('<HHHH', grp_idx, nc, tf, cl)
-            rval += group[4].astype(sp.float32).tostring()
-            rval += pack('<I', len(group[5]))
+            _HHHH.pack_into(rval, at, *group[:4])
+            at += 8
+            rval[at:at + 4 * group[4].size] = sp.asarray(
+                group[4], dtype='<f4').tostring()
+            at += 4 * group[4].size
+            _U32.pack_into(rval, at, len(group[5]))
+            at += 4
             for unit in group[5]:
-                rval += pack('<I', unit[0])
-                rval += unit[1].T.astype(sp.float32).tostring()
-                rval += unit[2].T.astype(sp.float32).tostring()
-                rval += pack('<fBHH', unit[3], unit[4], unit[5], unit[6])
-        return rval
+                _U32.pack_into(rval, at, unit[0])
+                at += 4
+                for arr in unit[1:3]:
+                    rval[at:at + 4 * arr.size] = sp.asarray(
+                        arr.T, dtype='<f4').tostring()
+                    at += 4 * arr.size
+                _FBHH.pack_into(rval, at, *unit[3:7])
+                at += 9
+        return str(rval)
 
     def __len__(self):
-        return len(self.payload())
+        rval = len(self.header) + 2
+        for group in self.group_lst:
+            rval += 8 + 4 * group[4].size + 4
+            for unit in group[5]:
+                rval += 4 + 4 * unit[1].size + 4 * unit[2].size + 9
+        return rval
 
     def __str__(self):
         super_str = super(BS3SortSetupBlock, self).__str__()
@@ -151,41 +189,42 @@ class BS3SortSetupBlock(BS3SortBaseBlock):
     def from_data(data, header=None):
         """build from data"""
 
-        if not isinstance(data, str):
-            raise TypeError('needs a sting as input!')
+        if not isinstance(data, BUFFER_TYPES):
+            raise TypeError('needs a str or buffer as input!')
         at = 0
 
         # groups
         group_lst = []
-        ngroup, = unpack('<H', data[at:at + 2])
+        ngroup, = _U16.unpack_from(data, at)
         at += 2
         if ngroup > 0:
             for _ in xrange(ngroup):
-                grp_idx, nc, tf, cl = unpack('<HHHH', data[at:at + 8])
+                grp_idx, nc, tf, cl = _HHHH.unpack_from(data, at)
                 at += 8
                 tf_nc = tf * nc
-                cov = sp.frombuffer(data[at:at + tf_nc * tf_nc * 4],
-                                    dtype=sp.float32)
+                cov = sp.frombuffer(data, dtype=sp.float32,
+                                    count=tf_nc * tf_nc, offset=at)
                 at += tf_nc * tf_nc * 4
                 cov.shape = (tf_nc, tf_nc)
-                nunit, = unpack('<I', data[at:at + 4])
+                nunit, = _U32.unpack_from(data, at)
                 at += 4
                 unit_lst = []
                 if nunit > 0:
                     for _ in xrange(nunit):
-                        filt = sp.frombuffer(
-                            data[at:at + tf_nc * 4],
-                            dtype=sp.float32
-                        ).reshape(tf, nc).T
+                        unit_idx, = _U32.unpack_from(data, at)
+                        at += 4
+                        filt = sp.frombuffer(data, dtype=sp.float32,
+                                             count=tf_nc, offset=at)
+                        filt = filt.reshape(tf, nc).T
                         at += tf_nc * 4
-                        temp = sp.frombuffer(
-                            data[at:at + tf_nc * 4],
-                            dtype=sp.float32
-                        ).reshape(tf, nc).T
+                        temp = sp.frombuffer(data, dtype=sp.float32,
+                                             count=tf_nc, offset=at)
+                        temp = temp.reshape(tf, nc).T
                         at += tf_nc * 4
-                        snr, active, u1, u2 = unpack('<fBHH', data[at:at + 9])
+                        snr, active, u1, u2 = _FBHH.unpack_from(data, at)
                         at += 9
-                        unit_lst.append((filt, temp, snr, active, u1, u2))
+                        unit_lst.append(
+                            (unit_idx, filt, temp, snr, active, u1, u2))
                 group_lst.append((grp_idx, nc, tf, cl, cov, unit_lst))
         return BS3SortSetupBlock(group_lst, header=header)
 
@@ -196,7 +235,7 @@ class BS3SortDataBlock(BS3SortBaseBlock):
     def __init__(self, event_lst, header=None):
         """
         :Paramters:
-            event_lst : list
+            event_lst : list or ndarray
                 list of event channel chunks. entry:
                     group_idx::uint16,
                     unit_idx::uint32,
@@ -204,48 +243,54 @@ class BS3SortDataBlock(BS3SortBaseBlock):
                     event_type::uint16,
                     user1::uint16,
                     user2::uint16
+                a structured ndarray with these fields is kept as event_arr
+                and event_lst holds its records. payload always sends
+                event_lst.
+            header : BS3SortBlockHeader
         """
 
         # super
-        super(BS3SortDataBlock, self).__init__(BS3SortBlockHeader(1))
+        super(BS3SortDataBlock, self).__init__(
+            header or BS3SortBlockHeader(1))
 
         # members
+        self.event_arr = None
+        if isinstance(event_lst, sp.ndarray):
+            self.event_arr = event_lst
+            event_lst = event_lst.tolist()
         self.event_lst = list(event_lst)
 
     def payload(self):
-        rval = ''
-        rval += self.header.payload()
-        rval += pack('<I', len(self.event_lst))
-        if len(self.event_lst) > 0:
-            for ev in self.event_lst:
-                rval += pack('<HIQHHH', *ev)
-        return rval
+        rval = bytearray(len(self))
+        self.header.pack_into(rval, 0)
+        at = len(self.header)
+        _U32.pack_into(rval, at, len(self.event_lst))
+        at += 4
+        rval[at:] = sp.array(map(tuple, self.event_lst),
+                             dtype=_EVENT_DT).tostring()
+        return str(rval)
 
     def __len__(self):
-        return len(self.payload())
+        return len(self.header) + 4 + _EVENT.size * len(self.event_lst)
 
     def __str__(self):
         super_str = super(BS3SortDataBlock, self).__str__()
         return '%s::[ev:%d]' % (super_str, len(self.event_lst))
 
     @staticmethod
-    def from_data( data, header=None):
+    def from_data(data, header=None):
         """build from data"""
 
-        if not isinstance(data, str):
-            raise TypeError('needs a sting as input!')
+        if not isinstance(data, BUFFER_TYPES):
+            raise TypeError('needs a str or buffer as input!')
         at = 0
 
         # events
-        event_lst = []
-        nevent, = unpack('<I', data[at:at + 4])
+        nevent, = _U32.unpack_from(data, at)
         at += 4
-        if nevent > 0:
-            for _ in xrange(nevent):
-                ev = unpack('<HIQHHH', data[at:at + 20])
-                at += 20
-                event_lst.append(ev)
-        return BS3SortDataBlock(event_lst, header=header)
+        event_arr = sp.frombuffer(data, dtype=_EVENT_DT, count=nevent,
+                                  offset=at)
+        return BS3SortDataBlock(event_arr, header=header)
 
 ##---PROTOCOL
 
@@ -254,20 +299,22 @@ class SORTProtocolHandler(ProtocolHandler):
 
     def on_block_ready(self, block_header, block_data):
         if block_header.block_code == self.PROTOCOL:
-            at = BS3SortBlockHeader.__len__()
-            prot_header = BS3SortBlockHeader.from_data(block_data[:at])
+            at = BS3SortBlockHeader.SIZE
+            prot_header = BS3SortBlockHeader.from_data(block_data)
             prot_block = None
             if prot_header.block_type == 0:
-                prot_block = BS3SortSetupBlock.from_data(block_data[at:])
+                prot_block = BS3SortSetupBlock.from_data(
+                    buffer(block_data, at))
             elif prot_header.block_type == 1:
-                prot_block = BS3SortDataBlock.from_data(block_data[at:])
+                prot_block = BS3SortDataBlock.from_data(
+                    buffer(block_data, at))
             else:
-                print 'unknown block_code: %s::%s' % (
-                    block_header, prot_header)
+                LOG.warning('unknown block_code: %s::%s', block_header,
+                            prot_header)
             return prot_block
         else:
             # other blocks -- what is wrong here?
-            print 'received block for other protocol! %s' % block_header
+            LOG.warning('received block for other protocol! %s', block_header)
             return None
 
 PROT = {'H': BS3SortBlockHeader,
@@ -33,23 +33,48 @@
 
 """protocol for the waveforms"""
 __docformat__ = 'restructuredtext'
-__all__ = ['BS3WaveBlockHeader', 'BS3WaveBaseBlock', 'BS3WaveSetupBlock', 'BS3WaveDataBlock',
-           'WAVEProtocolHandler']
+__all__ = ['BS3WaveBlockHeader', 'BS3WaveBaseBlock', 'BS3WaveSetupBlock',
+           'BS3WaveDataBlock', 'WAVEProtocolHandler']
 
 ##---IMPORTS
 
-from struct import pack, unpack
+import logging
+from struct import Struct, error as StructError
 import scipy as sp
-from blockstream import BS3BaseHeader, BS3BaseBlock
+from blockstream import (BS3BaseHeader, BS3BaseBlock, BUFFER_TYPES,
+                         get_struct)
 from bs_reader import ProtocolHandler
 
+##---CONSTANTS
+
+LOG = logging.getLogger(__name__)
+_U32 = Struct('<I')
+_WAVE_EV = Struct('<HIQHH')
+_WAVE_SET = Struct('<HHHddd')
+
+##---FUNCTIONS
+
+def _wave_ev_dtype(nsample):
+    """record dtype of a waveform event with nsample int16 samples"""
+
+    return sp.dtype([('group_idx', '<u2'),
+                     ('unit_idx', '<u4'),
+                     ('time_val', '<u8'),
+                     ('nc', '<u2'),
+                     ('ns', '<u2'),
+                     ('samples', '<i2', (nsample,))])
+
 ##---CLASSES
 
 class BS3WaveBlockHeader(BS3BaseHeader):
     """header for a datablock of type SORT from the blockstream protocol"""
 
+    __slots__ = ('block_type',)
+
     version = 1
     signature = '<BB'
+    _struct = get_struct(signature)
+    SIZE = _struct.size
 
     def __init__(self, block_type):
         """
@@ -61,7 +86,10 @@ class BS3WaveBlockHeader(BS3BaseHeader):
         self.block_type = int(block_type)
 
     def payload(self):
-        return pack(self.signature, self.version, self.block_type)
+        return self._struct.pack(self.version, self.block_type)
+
+    def pack_into(self, buf, offset):
+        self._struct.pack_into(buf, offset, self.version, self.block_type)
 
     def __str__(self):
         return '[$%s]' % self.block_type
@@ -70,13 +98,13 @@ class BS3WaveBlockHeader(BS3BaseHeader):
     def from_data(data):
         """build from data"""
 
-        if not isinstance(data, str):
-            raise TypeError('needs a sting as input!')
-        if len(data) < BS3WaveBlockHeader.__len__():
+        if not isinstance(data, BUFFER_TYPES):
+            raise TypeError('needs a str or buffer as input!')
+        try:
+            ver, btp = BS3WaveBlockHeader._struct.unpack_from(data, 0)
+        except StructError:
             raise ValueError(
-                'data must have len >= %s' % BS3WaveBlockHeader.__len__())
-        ver, btp = unpack(BS3WaveBlockHeader.signature,
-            data[:BS3WaveBlockHeader.__len__()])
+                'data must have len >= %s' % BS3WaveBlockHeader.SIZE)
         if ver != BS3WaveBlockHeader.version:
             raise ValueError('invalid protocol version(%s)!' % ver)
         return BS3WaveBlockHeader(btp)
@@ -113,16 +141,18 @@ class BS3WaveSetupBlock(BS3WaveBaseBlock):
         self.setup_lst = list(setup_lst)
 
     def payload(self):
-        rval = ''
-        rval += self.header.payload()
-        rval += pack('<I', len(self.setup_lst))
-        if len(self.setup_lst) > 0:
-            for set in self.setup_lst:
-                rval += pack('<HHHddd', *set)
-        return rval
+        rval = bytearray(len(self))
+        self.header.pack_into(rval, 0)
+        at = len(self.header)
+        _U32.pack_into(rval, at, len(self.setup_lst))
+        at += 4
+        for setup in self.setup_lst:
+            _WAVE_SET.pack_into(rval, at, *setup)
+            at += _WAVE_SET.size
+        return str(rval)
 
     def __len__(self):
-        return len(self.payload())
+        return len(self.header) + 4 + _WAVE_SET.size * len(self.setup_lst)
 
     def __str__(self):
         super_str = super(BS3WaveSetupBlock, self).__str__()
@@ -132,19 +162,17 @@ class BS3WaveSetupBlock(BS3WaveBaseBlock):
     def from_data(data, header=None):
         """build from data"""
 
-        if not isinstance(data, str):
-            raise TypeError('needs a sting as input!')
+        if not isinstance(data, BUFFER_TYPES):
+            raise TypeError('needs a str or buffer as input!')
         at = 0
 
         # events
         setup_lst = []
-        nevent, = unpack('<I', data[at:at + 4])
+        nevent, = _U32.unpack_from(data, at)
         at += 4
-        if nevent > 0:
-            for _ in xrange(nevent):
-                gid, chid, ns, sr, vr, m = unpack('<HHHddd', data[at:at + 30])
-                at += 30
-                setup_lst.append((gid, chid, ns, sr, vr, m))
+        for _ in xrange(nevent):
+            setup_lst.append(_WAVE_SET.unpack_from(data, at))
+            at += _WAVE_SET.size
         return BS3WaveSetupBlock(setup_lst, header=header)
 
 
@@ -154,7 +182,7 @@ class BS3WaveDataBlock(BS3WaveBaseBlock):
     def __init__(self, event_lst, header=None):
         """
         :Paramters:
-            event_lst : list
+            event_lst : list or ndarray
                 list of waveform data entry:
                     group_idx::uint16,
                     unit_idx::uint32,
@@ -162,28 +190,58 @@ class BS3WaveDataBlock(BS3WaveBaseBlock):
                     nC::uint16,
                     nS::uint16,
                     samples::uint16[nS*nC]
+                for equal shaped waveforms a structured ndarray of
+                `_wave_ev_dtype` is kept as event_arr and event_lst holds
+                its records with the samples as (nS, nC) views. payload
+                always sends event_lst.
             header : BS3WaveBlockHeader
         """
 
         # super
         super(BS3WaveDataBlock, self).__init__(
-            header or BS3WaveBlockHeader(0))
+            header or BS3WaveBlockHeader(1))
 
         # members
+        self.event_arr = None
+        if isinstance(event_lst, sp.ndarray):
+            self.event_arr = event_lst
+            names = event_lst.dtype.names
+            event_lst = [
+                (gid, uid, tv, nc, ns, wf.reshape(nc, ns).T)
+                for gid, uid, tv, nc, ns, wf in zip(
+                    *[event_lst[name].tolist() for name in names[:-1]] +
+                    [event_lst['samples']])]
         self.event_lst = list(event_lst)
 
     def payload(self):
-        rval = ''
-        rval += self.header.payload()
-        rval += pack('<I', len(self.event_lst))
-        if len(self.event_lst) > 0:
-            for ev in self.event_lst:
-                rval += pack('<HIQHH', ev[:-1])
-                rval += ev[-1].T.astype(sp.float32).tostring()
-        return rval
+        rval = bytearray(len(self))
+        self.header.pack_into(rval, 0)
+        at = len(self.header)
+        _U32.pack_into(rval, at, len(self.event_lst))
+        at += 4
+        shape = set(ev[-1].shape for ev in self.event_lst)
+        if len(shape) == 1:
+            # equal shaped waveforms are evenly strided records, write all
+            # events in one go
+            ev_arr = sp.empty(len(self.event_lst),
+                              dtype=_wave_ev_dtype(self.event_lst[0][-1].size))
+            for i, name in enumerate(ev_arr.dtype.names[:-1]):
+                ev_arr[name] = [ev[i] for ev in self.event_lst]
+            ev_arr['samples'] = sp.array(
+                [ev[-1].T for ev in self.event_lst]).reshape(len(ev_arr), -1)
+            rval[at:] = ev_arr.tostring()
+            return str(rval)
+        for ev in self.event_lst:
+            _WAVE_EV.pack_into(rval, at, *ev[:-1])
+            at += _WAVE_EV.size
+            rval[at:at + 2 * ev[-1].size] = sp.asarray(
+                ev[-1].T, dtype='<i2').tostring()
+            at += 2 * ev[-1].size
+        return str(rval)
 
     def __len__(self):
-        return len(self.payload())
+        return (len(self.header) + 4 +
+                sum(_WAVE_EV.size + 2 * ev[-1].size for ev in self.event_lst))
 
     def __str__(self):
         super_str = super(BS3WaveDataBlock, self).__str__()
@@ -193,24 +251,30 @@ class BS3WaveDataBlock(BS3WaveBaseBlock):
     def from_data(data, header=None):
         """build from data"""
 
-        if not isinstance(data, str):
-            raise TypeError('needs a sting as input!')
+        if not isinstance(data, BUFFER_TYPES):
+            raise TypeError('needs a str or buffer as input!')
         at = 0
 
         # events
-        event_lst = []
-        nevent, = unpack('<I', data[at:at + 4])
+        nevent, = _U32.unpack_from(data, at)
         at += 4
-        if nevent > 0:
-            for _ in xrange(nevent):
-                gid, uid, tv, nc, ns = unpack('<HIQHH', data[at:at + 18])
-                at += 18
-                wf = sp.frombuffer(
-                    data[at:at + ns * nc * 2],
-                    dtype=sp.int16
-                ).reshape(nc, ns).T
-                at += ns * nc * 2
-                event_lst.append((gid, uid, tv, nc, ns, wf))
+        ev_hdr = []
+        for _ in xrange(nevent):
+            ev = _WAVE_EV.unpack_from(data, at)
+            ev_hdr.append((ev, at + _WAVE_EV.size))
+            at += _WAVE_EV.size + 2 * ev[3] * ev[4]
+        shape = set(ev[3:5] for ev, _ in ev_hdr)
+        if len(shape) == 1:
+            # equal shaped waveforms, view all events as one record array
+            nc, ns = shape.pop()
+            event_arr = sp.frombuffer(data, dtype=_wave_ev_dtype(nc * ns),
+                                      count=nevent, offset=4)
+            return BS3WaveDataBlock(event_arr, header=header)
+        event_lst = []
+        for (gid, uid, tv, nc, ns), at in ev_hdr:
+            wf = sp.frombuffer(data, dtype=sp.int16, count=ns * nc,
+                               offset=at).reshape(nc, ns).T
+            event_lst.append((gid, uid, tv, nc, ns, wf))
         return BS3WaveDataBlock(event_lst, header=header)
 
 ##---PROTOCOL
@@ -220,20 +284,22 @@ class WAVEProtocolHandler(ProtocolHandler):
 
     def on_block_ready(self, block_header, block_data):
         if block_header.block_code == self.PROTOCOL:
-            at = BS3WaveBlockHeader.__len__()
-            prot_header = BS3WaveBlockHeader.from_data(block_data[:at])
+            at = BS3WaveBlockHeader.SIZE
+            prot_header = BS3WaveBlockHeader.from_data(block_data)
             prot_block = None
             if prot_header.block_type == 0:
-                prot_block = BS3WaveSetupBlock.from_data(block_data[at:])
+                prot_block = BS3WaveSetupBlock.from_data(
+                    buffer(block_data, at))
             elif prot_header.block_type == 1:
-                prot_block = BS3WaveDataBlock.from_data(block_data[at:])
+                prot_block = BS3WaveDataBlock.from_data(
+                    buffer(block_data, at))
             else:
-                print 'unknown block_code: %s::%s' % (
-                    block_header, prot_header)
+                LOG.warning('unknown block_code: %s::%s', block_header,
+                            prot_header)
             return prot_block
         else:
             # other blocks -- what is wrong here?
-            print 'received block for other protocol! %s' % block_header
+            LOG.warning('received block for other protocol! %s', block_header)
             return None
 
 
@@ -11,10 +11,7 @@
 
 ##---IMPORTS
 
-import ez_setup
-
-ez_setup.use_setuptools()
-from setuptools import setup, find_packages
+from setuptools import setup
 
 ##---STINGS
 
@@ -1,33 +1,52 @@
+import logging
+from threading import Thread
+import Queue as queue
 from blockstream import (BS3Reader, COVEProtocolHandler,
-                         WAVEProtocolHandler, Queue, Empty, USE_PROCESS)
+                         WAVEProtocolHandler, Queue, Empty)
 from common import MxRingBuffer
 from spikeplot import plt, waveforms, save_figure
 
+def drain(Q, timeout=2):
+    """discard queued items up to the end of stream marker"""
+
+    try:
+        while Q.get(block=True, timeout=timeout) is not None:
+            pass
+    except Empty:
+        pass
+
+
 def test_cove_reader(n=10000):
     plt.interactive(True)
     try:
         FIG = plt.figure()
         Q = Queue()
-        bs_reader = BS3Reader(COVEProtocolHandler, Q, verbose=True,
+        bs_reader = BS3Reader(COVEProtocolHandler, Q, verbose=False,
                               ident='TestCOVE')
         bs_reader.start()
-        for _ in xrange(n):
-            print Q.qsize()
+        for i in xrange(n):
+            if i & 0x3FF == 0:
+                print 'qsize:', Q.qsize()
             try:
                 item = Q.get(block=True, timeout=2)
+                if item is None:
+                    # end of stream, the reader has shut down
+                    break
                 FIG.clf()
                 plt.imshow(item.data_lst[-1], shape=item.data_lst[-1].shape,
                            figure=FIG)
             except Empty:
                 continue
+    except KeyboardInterrupt:
+        print 'interrupted'
     except Exception, ex:
         print ex
     finally:
-        raw_input()
+        # stop waits for the reader to shut down, a reader process only
+        # exits once its queued items are delivered, so empty Q first
         bs_reader.stop()
-        if USE_PROCESS is True:
-            bs_reader.terminate()
-            # finalize app
+        drain(Q)
+        bs_reader.join()
         print 'exit!'
 
 
@@ -37,6 +56,25 @@ def test_wave_reader(n=10000):
         update = 0
         FIG = plt.figure()
         rb = None
+
+        # plotting and saving runs in the background, frames arriving while
+        # the plotter is busy are dropped
+        plot_q = queue.Queue(maxsize=1)
+
+        def plotter():
+            while True:
+                wf_buf, tf = plot_q.get()
+                print 'plotting enter'
+                FIG.clear()
+                waveforms({0: wf_buf}, tf=tf, plot_handle=FIG,
+                          plot_separate=False, show=False)
+                #plt.draw()
+                save_figure(FIG, 'wave', file_dir='E:\SpiDAQ')
+                print 'plotting exit'
+
+        plot_thread = Thread(target=plotter, name='plotter')
+        plot_thread.daemon = True
+        plot_thread.start()
         Q = Queue()
         bs_reader = BS3Reader(WAVEProtocolHandler, Q, verbose=False,
                               ident='TestWAVE')
@@ -44,36 +82,60 @@ def test_wave_reader(n=10000):
         for _ in xrange(n):
             #print Q.qsize()
             try:
-                item = Q.get(block=True, timeout=2)
-                for wave in item.event_lst:
-                    gid, uid, tv, nc, ns, wf = wave
-                    if rb is None:
-                        rb = MxRingBuffer(dimension=(ns, nc), capacity=2000)
-                    rb.append(wf)
-                    #print 'rb:', len(rb)
-                    update += 1
+                # drain what is queued up, one blocking get per batch
+                items = [Q.get(block=True, timeout=2)]
+                try:
+                    while len(items) < 64:
+                        items.append(Q.get_nowait())
+                except Empty:
+                    pass
+                eos = items[-1] is None
+                if eos:
+                    # end of stream, the reader has shut down
+                    items.pop()
+                for item in items:
+                    if item.event_arr is not None and len(item.event_arr):
+                        # equal shaped waveforms, take all samples at once
+                        nc = int(item.event_arr['nc'][0])
+                        ns = int(item.event_arr['ns'][0])
+                        wf_lst = item.event_arr['samples'].reshape(
+                            -1, nc, ns).transpose(0, 2, 1)
+                    else:
+                        wf_lst = [wave[-1] for wave in item.event_lst]
+                    for wf in wf_lst:
+                        if rb is None:
+                            tf = wf.shape[0]
+                            rb = MxRingBuffer(dimension=wf.shape,
+                                              capacity=2000)
+                        rb.append(wf)
+                        #print 'rb:', len(rb)
+                        update += 1
+                # the ring buffer holds what we need, release the blocks
+                items = item = wf_lst = wf = None
                 if update > 1000:
-                    print 'plotting enter'
-                    FIG.clear()
-                    waveforms({0: rb[:]}, tf=ns, plot_handle=FIG,
-                                        plot_separate=False, show=False)
-                    #plt.draw()
-                    save_figure(FIG, 'wave', file_dir='E:\SpiDAQ')
+                    try:
+                        plot_q.put_nowait((rb[:], tf))
+                    except queue.Full:
+                        pass
                     update = 0
-                    print 'plotting exit'
+                if eos:
+                    break
             except Empty:
                 continue
+    except KeyboardInterrupt:
+        print 'interrupted'
     except Exception, ex:
         print ex
     finally:
-        raw_input()
+        # stop waits for the reader to shut down, a reader process only
+        # exits once its queued items are delivered, so empty Q first
         bs_reader.stop()
-        if USE_PROCESS is True:
-            bs_reader.terminate()
-            # finalize app
+        drain(Q)
+        bs_reader.join()
         print 'exit!'
 
 
 if __name__ == '__main__':
+    logging.basicConfig(level=logging.WARNING)
     #test_cove_reader()
     test_wave_reader()
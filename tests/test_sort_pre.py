@@ -6,8 +6,10 @@ GID = 0
 UID = 1
 TF = 3
 NC = 1
-TEMP = sp.array([[0, 1.0, 0] for i in xrange(NC)], dtype=sp.float32).T
+TEMP = sp.zeros((TF, NC), dtype=sp.float32)
+TEMP[1, :] = 1.0
 FILT = TEMP
+COV = sp.eye(TF * NC, dtype=sp.float32)
 
 if __name__ == '__main__':
     try:
@@ -16,7 +18,7 @@ if __name__ == '__main__':
         WID = LIB.startWriter('pyTestSortWriter', 'SORT')
         print 'returned: WID = LIB.startWriter(\'pyTestSortWriter\', \'SORT\')'
         PREAMBLE = BS3SortSetupBlock([
-            [GID, NC, TF, 0, sp.eye(TF * NC, dtype=sp.float32),
+            [GID, NC, TF, 0, COV,
                 [(UID, FILT, TEMP, 1.0, 1, 0, 0)]]
         ])
         LIB.setPreamble(WID, PREAMBLE.BLOCK_CODE, PREAMBLE.payload(),